@@ -0,0 +1,72 @@
+"""
+Compare image embedding through read_png with plain Canvas.drawImage.
+
+Usage: python benchmarks/images.py NOTEBOOK [REPEAT]
+
+Converts NOTEBOOK in memory REPEAT times (default 3) each way and prints
+the best time and the PDF size, along with the PNG formats found.
+"""
+
+from __future__ import print_function
+
+import collections
+import mmap
+import os.path
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lecturenotes2pdf import pdf
+from lecturenotes2pdf.notebook import Notebook
+from lecturenotes2pdf.png import _parse_png
+
+
+def png_formats(notebook):
+    formats = collections.Counter()
+    for page in notebook.pages:
+        for filename in page.image_layers:
+            with open(filename, 'rb') as fp:
+                mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+                chunks = _parse_png(mm, filename)
+                mm.close()
+            if chunks is None:
+                formats['unreadable'] += 1
+            else:
+                header = chunks[0]
+                formats['colour type {}, {} bit{}'.format(
+                    header.color_type, header.bit_depth,
+                    ', interlaced' if header.interlace else '')] += 1
+    return formats
+
+
+def best_time(notebook, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.time()
+        data = pdf.notebook2pdf_bytes(notebook)
+        times.append(time.time() - t0)
+    return min(times), len(data)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(2)
+    notebook = Notebook(sys.argv[1])
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    for fmt, count in sorted(png_formats(notebook).items()):
+        print('{:<30} {:5} images'.format(fmt, count))
+
+    read_png = pdf.read_png
+    for label, reader in [('read_png', read_png),
+                          ('Canvas.drawImage', lambda filename: None)]:
+        pdf.read_png = reader
+        t, size = best_time(notebook, repeat)
+        print('{:<30} best {:7.2f} s   {:9} bytes'.format(label, t, size))
+    pdf.read_png = read_png
+
+
+if __name__ == '__main__':
+    main()
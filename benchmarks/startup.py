@@ -0,0 +1,70 @@
+"""
+Measure start-up time of 'lecturenotes2pdf --list'.
+
+Usage: python benchmarks/startup.py LOCATION [REPEAT]
+
+Runs the command line tool REPEAT times (default 20) on LOCATION and prints
+the best and mean wall-clock times next to those of a bare interpreter.
+Exits with an error if listing pulls in reportlab.
+"""
+
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ['reportlab']
+
+CHECK_IMPORTS = '''
+import sys
+sys.argv = ['lecturenotes2pdf', '--list', sys.argv[1]]
+from lecturenotes2pdf.__main__ import main
+main()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+if heavy:
+    sys.stderr.write('heavy modules loaded: {{}}\\n'.format(', '.join(heavy)))
+    sys.exit(1)
+'''.format(heavy=HEAVY_MODULES)
+
+
+def time_command(cmd, repeat, env):
+    times = []
+    with open(os.devnull, 'w') as devnull:
+        for _ in range(repeat):
+            t0 = time.time()
+            subprocess.check_call(cmd, stdout=devnull, env=env)
+            times.append(time.time() - t0)
+    return min(times), sum(times) / len(times)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip(), file=sys.stderr)
+        sys.exit(2)
+    location = sys.argv[1]
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    env = dict(os.environ)
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(
+        [src_dir] + ([env['PYTHONPATH']] if 'PYTHONPATH' in env else []))
+
+    with open(os.devnull, 'w') as devnull:
+        ret = subprocess.call([sys.executable, '-c', CHECK_IMPORTS, location],
+                              stdout=devnull, env=env)
+    if ret != 0:
+        sys.exit('FAIL: --list imports heavy modules')
+
+    for label, cmd in [
+            ('python', [sys.executable, '-c', 'pass']),
+            ('lecturenotes2pdf --list',
+             [sys.executable, '-m', 'lecturenotes2pdf', '--list', location])]:
+        best, mean = time_command(cmd, repeat, env)
+        print('{:<25} best {:7.1f} ms   mean {:7.1f} ms'.format(
+            label, best * 1000, mean * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,10 +6,10 @@ from __future__ import absolute_import, print_function
 
 import argparse
 import logging
+import os.path
 import sys
 
 from .notebook import Notebook, NotebooksBoard
-from .pdf import notebook2pdf
 
 
 def list_board(board):
@@ -27,6 +27,8 @@ def list_notebook(nb):
                       len(pg.text_boxes)))
 
 def convert_notebook(nb, verbosity):
+    # reportlab is slow to import; don't load it unless we are rendering
+    from .pdf import notebook2pdf
     pdf_filename = nb.name + '.pdf'
     if verbosity > 0:
         print('Creating', pdf_filename)
@@ -38,15 +40,76 @@ def convert_board(board, verbosity):
         convert_notebook(nb, verbosity)
 
 
+def enqueue_notebooks(locations, queue_path, verbosity):
+    # Notebooks are only read by the workers, which record any errors
+    from .workqueue import WorkQueue
+    queue = WorkQueue(queue_path)
+    for location in locations:
+        location = os.path.abspath(location)
+        pdf_filename = os.path.abspath(os.path.basename(location) + '.pdf')
+        if verbosity > 0:
+            print('Queueing', location, '->', pdf_filename)
+        queue.add(location, pdf_filename)
+    queue.close()
+
+
+def work_queue(queue_path, lease_time, verbosity):
+    from .workqueue import WorkQueue, work
+    queue = WorkQueue(queue_path, lease_time=lease_time)
+    done = work(queue)
+    if verbosity > 0:
+        print('Converted', done, 'notebooks')
+    queue.close()
+
+
+def print_queue_status(queue_path):
+    from .workqueue import WorkQueue, FAILED
+    queue = WorkQueue(queue_path)
+    for state, count in sorted(queue.counts().items()):
+        print('{}: {}'.format(state, count))
+    for location, output, state, attempts, error in queue.jobs(FAILED):
+        print('FAILED', location, '-', error)
+    queue.close()
+
+
 def main():
     arg_parser = argparse.ArgumentParser('lecturenotes2pdf')
-    arg_parser.add_argument('location', help='location of LectureNotes data')
-    arg_parser.add_argument('-l', '--list', action='store_true',
-                            help='list all notebooks and pages')
-    arg_parser.add_argument('-v', '--verbose', action='count',
+    arg_parser.add_argument('location', nargs='?',
+                            help='location of LectureNotes data')
+    arg_parser.add_argument('-v', '--verbose', action='count', default=0,
                             help='say what is being done (also: -vv, -vvv)')
+    mode = arg_parser.add_mutually_exclusive_group()
+    mode.add_argument('-l', '--list', action='store_true',
+                      help='list all notebooks and pages')
+    mode.add_argument('--serve', action='store_true',
+                      help='run as a worker: read notebook locations '
+                           'from stdin, write PDFs to stdout')
+    mode.add_argument('--enqueue', metavar='DB',
+                      help='add conversion jobs for all notebooks to '
+                           'the work queue DB instead of converting')
+    mode.add_argument('--work', metavar='DB',
+                      help='convert notebooks from the work queue DB '
+                           'until it is empty')
+    mode.add_argument('--queue-status', metavar='DB',
+                      help='show the state of the work queue DB')
+    arg_parser.add_argument('--lease-time', metavar='SECONDS', type=float,
+                            help='with --work: how long a job stays reserved '
+                                 'for a worker that stops responding '
+                                 '(default: 1800)')
 
     args = arg_parser.parse_args()
+    if args.serve or args.work or args.queue_status:
+        if args.location is not None:
+            arg_parser.error('location cannot be used with --serve, --work '
+                             'or --queue-status')
+    elif args.location is None:
+        arg_parser.error('location is required')
+    if args.lease_time is None:
+        args.lease_time = 1800
+    elif not args.work:
+        arg_parser.error('--lease-time can only be used with --work')
+    elif args.lease_time <= 0:
+        arg_parser.error('--lease-time must be positive')
 
     logger = logging.getLogger('lecturenotes2pdf')
     # create console handler and set level to debug
@@ -68,6 +131,17 @@ def main():
         logger.setLevel(logging.WARNING)
         ch.setLevel(logging.WARNING)
 
+    if args.serve:
+        from .server import serve
+        serve()
+        return
+    elif args.work:
+        work_queue(args.work, args.lease_time, args.verbose)
+        return
+    elif args.queue_status:
+        print_queue_status(args.queue_status)
+        return
+
     try:
         board = NotebooksBoard(args.location)
     except ValueError:
@@ -83,6 +157,12 @@ def main():
             list_board(board)
         else:
             list_notebook(notebook)
+    elif args.enqueue:
+        if board is not None:
+            locations = board.all_notebook_paths()
+        else:
+            locations = [notebook.root]
+        enqueue_notebooks(locations, args.enqueue, args.verbose)
     elif board is not None:
         convert_board(board, args.verbose)
     else:
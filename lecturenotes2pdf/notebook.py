@@ -22,14 +22,11 @@ class NotebooksBoard(object):
         self.root = path
 
     def children(self):
-        for child_file in os.listdir(self.root):
-            child_path = os.path.join(self.root, child_file)
-            if os.path.isdir(child_path):
-                grandchildren = os.listdir(child_path)
-                if 'notebook.xml' in grandchildren:
-                    yield Notebook(child_path)
-                elif 'folder.xml' in grandchildren:
-                    yield Folder(child_path)
+        for child_path, is_notebook in _child_dirs(self.root):
+            if is_notebook:
+                yield Notebook(child_path)
+            else:
+                yield Folder(child_path)
 
     def all_notebooks(self):
         for child in self.children():
@@ -39,6 +36,12 @@ class NotebooksBoard(object):
                 for descendant in NotebooksBoard.all_notebooks(child):
                     yield descendant
 
+    def all_notebook_paths(self):
+        """
+        Locations of all notebooks, found without reading the notebooks
+        """
+        return _notebook_paths(self.root)
+
 
 class Folder(object):
     def __init__(self, path):
@@ -50,14 +53,36 @@ class Folder(object):
         self.root = path
 
     def children(self):
-        for child_file in os.listdir(self.root):
-            child_path = os.path.join(self.root, child_file)
-            if os.path.isdir(child_path):
-                grandchildren = os.listdir(child_path)
-                if 'notebook.xml' in grandchildren:
-                    yield Notebook(child_path)
-                elif 'folder.xml' in grandchildren:
-                    yield Folder(child_path)
+        for child_path, is_notebook in _child_dirs(self.root):
+            if is_notebook:
+                yield Notebook(child_path)
+            else:
+                yield Folder(child_path)
+
+
+def _child_dirs(root):
+    """
+    Find the notebooks and folders in a board or folder directory.
+
+    Yields (path, is_notebook) tuples.
+    """
+    for child_file in os.listdir(root):
+        child_path = os.path.join(root, child_file)
+        if os.path.isdir(child_path):
+            grandchildren = os.listdir(child_path)
+            if 'notebook.xml' in grandchildren:
+                yield child_path, True
+            elif 'folder.xml' in grandchildren:
+                yield child_path, False
+
+
+def _notebook_paths(root):
+    for child_path, is_notebook in _child_dirs(root):
+        if is_notebook:
+            yield child_path
+        else:
+            for path in _notebook_paths(child_path):
+                yield path
 
 
 class Notebook(object):
@@ -6,19 +6,26 @@ PDF generation
 
 from __future__ import print_function, absolute_import
 
+import hashlib
 import logging
 
 from reportlab.pdfgen.canvas import Canvas
+from reportlab.pdfbase.pdfdoc import (PDFImageXObject, PDFStream,
+                                      PDFDictionary, PDFArray, PDFName)
 from reportlab.lib.units import inch
 
 from .notebook import TextingMachine
+from .png import read_png
 
 _log = logging.getLogger(__name__)
 
 class PDFGenerator(object):
-    def __init__(self, notebook, pdf_filename):
+    def __init__(self, notebook, pdf_file):
+        """
+        pdf_file may be a file name or any writable binary file-like object
+        """
         self.notebook = notebook
-        self.pdf_filename = pdf_filename
+        self.pdf_file = pdf_file
 
         self.dpi = 300.0
         self.pixel = inch / self.dpi
@@ -27,7 +34,13 @@ class PDFGenerator(object):
         self.height = notebook.paper_height * self.pixel
 
     def run(self):
-        canvas = Canvas(self.pdf_filename, pagesize=(self.width, self.height))
+        self.render().save()
+
+    def render(self):
+        """
+        Draw all pages and return the (unsaved) canvas
+        """
+        canvas = Canvas(self.pdf_file, pagesize=(self.width, self.height))
         canvas.setTitle(self.notebook.name)
 
         for page in self.notebook.pages:
@@ -35,7 +48,7 @@ class PDFGenerator(object):
             self.draw_page(canvas, page)
             canvas.showPage()
 
-        canvas.save()
+        return canvas
 
     def draw_page(self, canvas, page):
         # Draw the background
@@ -72,9 +85,90 @@ class PDFGenerator(object):
         _log.debug('{}: page {}: drawing image layer {}'.format(
             self.notebook.name, page.number, layer))
         # Note the layers are 1-indexed
-        canvas.drawImage(page.image_layers[layer-1],
-                         0, 0, self.width, self.height,
-                         mask='auto')
+        filename = page.image_layers[layer-1]
+        png = read_png(filename)
+        if png is not None and png.data is None:
+            _log.debug('{}: page {}: image layer {} is empty'.format(
+                self.notebook.name, page.number, layer))
+        elif png is not None:
+            self.draw_png(canvas, filename, png)
+        else:
+            canvas.drawImage(filename, 0, 0, self.width, self.height,
+                             mask='auto')
+
+    def draw_png(self, canvas, filename, png):
+        """
+        Draw a PNG image (as returned by read_png) across the page
+        """
+        # This follows Canvas.drawImage, which has no way of taking
+        # pre-compressed data.
+        if not isinstance(filename, bytes):
+            filename = filename.encode('utf-8')
+        name = 'png' + hashlib.md5(filename).hexdigest()
+        reg_name = canvas._doc.getXObjectName(name)
+        if not canvas._doc.hasForm(name):
+            img_obj = PNGImageXObject(name, png)
+            if png.alpha is not None:
+                alpha_name = name + 'a'
+                alpha_obj = PNGImageXObject(alpha_name, png._replace(
+                    colors=1, data=png.alpha, alpha=None))
+                img_obj.smask = canvas._doc.Reference(
+                    alpha_obj, canvas._doc.getXObjectName(alpha_name))
+            canvas._doc.Reference(img_obj, reg_name)
+            canvas._doc.addForm(name, img_obj)
+
+        canvas._currentPageHasImages = 1
+        canvas.saveState()
+        canvas.scale(self.width, self.height)
+        canvas._code.append('/{} Do'.format(reg_name))
+        canvas.restoreState()
+        canvas._formsinuse.append(name)
+
+
+class PNGImageXObject(PDFImageXObject):
+    """
+    Image XObject holding zlib-compressed image data from read_png
+    """
+    def __init__(self, name, png):
+        self.name = name
+        self.width = png.width
+        self.height = png.height
+        self.bitsPerComponent = png.bit_depth
+        self.colorSpace = 'DeviceGray' if png.colors == 1 else 'DeviceRGB'
+        self.colors = png.colors
+        self.predictor = png.predictor
+        self.streamContent = png.data
+        if png.transparent is not None:
+            # colour key masking: ranges of one value per component
+            self.mask = [v for v in png.transparent for _ in (0, 1)]
+        else:
+            self.mask = None
+        # reference to the alpha channel, set by PDFGenerator.draw_png
+        self.smask = None
+
+    def format(self, document):
+        S = PDFStream(content=self.streamContent)
+        d = S.dictionary
+        d['Type'] = PDFName('XObject')
+        d['Subtype'] = PDFName('Image')
+        d['Width'] = self.width
+        d['Height'] = self.height
+        d['BitsPerComponent'] = self.bitsPerComponent
+        d['ColorSpace'] = PDFName(self.colorSpace)
+        d['Filter'] = PDFName('FlateDecode')
+        if self.predictor:
+            d['DecodeParms'] = PDFDictionary({
+                # PNG predictors, chosen per row
+                'Predictor': 15,
+                'Colors': self.colors,
+                'BitsPerComponent': self.bitsPerComponent,
+                'Columns': self.width})
+        d['Length'] = len(self.streamContent)
+        if self.mask:
+            d['Mask'] = PDFArray(self.mask)
+        if self.smask is not None:
+            d['SMask'] = self.smask
+        return S.format(document)
 
 
 class PDFTextingMachine(TextingMachine):
@@ -172,5 +266,30 @@ class PDFTextingMachine(TextingMachine):
         self.textobject.textOut(lines[-1])
 
 
-def notebook2pdf(notebook, pdf_filename):
-    PDFGenerator(notebook, pdf_filename).run()
+def notebook2pdf(notebook, pdf_file):
+    """
+    Write notebook as PDF to pdf_file (a file name or a writable binary
+    file-like object)
+    """
+    PDFGenerator(notebook, pdf_file).run()
+
+
+def notebook2pdf_bytes(notebook):
+    """
+    Return the PDF of notebook as a bytes object
+    """
+    # The file name is only used by reportlab when saving, which we don't do.
+    return PDFGenerator(notebook, notebook.name + '.pdf').render().getpdfdata()
+
+
+def iter_notebook2pdf(notebook, chunk_size=65536):
+    """
+    Generate the PDF of notebook as a sequence of bytes chunks
+
+    This does not stream: reportlab only produces the PDF once every page
+    has been drawn, so the complete PDF is built in memory first and then
+    split into chunks of chunk_size bytes.
+    """
+    data = notebook2pdf_bytes(notebook)
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i+chunk_size]
@@ -0,0 +1,175 @@
+"""
+lecturenotes2pdf.png
+
+Minimal PNG reader for getting image data into a PDF with as little
+re-encoding as possible
+"""
+
+from __future__ import absolute_import
+
+from collections import namedtuple
+import logging
+import mmap
+import struct
+import zlib
+
+_log = logging.getLogger(__name__)
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+GRAYSCALE = 0
+TRUECOLOR = 2
+GRAYSCALE_ALPHA = 4
+TRUECOLOR_ALPHA = 6
+
+# colour type -> (colour components, bit depths PDF can take as they are)
+PASSTHROUGH_FORMATS = {
+    GRAYSCALE: (1, (1, 2, 4, 8)),
+    TRUECOLOR: (3, (8,)),
+}
+
+# colour type -> (colour components, PIL mode of the colour channels)
+ALPHA_FORMATS = {
+    GRAYSCALE_ALPHA: (1, 'L'),
+    TRUECOLOR_ALPHA: (3, 'RGB'),
+}
+
+PNGHeader = namedtuple('PNGHeader',
+                       ['width', 'height', 'bit_depth', 'color_type',
+                        'compression', 'filter_method', 'interlace'])
+
+# data and alpha are zlib streams. If predictor is true, data is the PNG
+# IDAT data (rows prefixed with a filter type byte); otherwise it, and
+# alpha, are plain samples. data is None for a fully transparent image.
+PNGImage = namedtuple('PNGImage',
+                      ['width', 'height', 'bit_depth', 'colors',
+                       'transparent', 'predictor', 'data', 'alpha'])
+
+
+def read_png(filename):
+    """
+    Read a PNG file for embedding in a PDF.
+
+    Grayscale and RGB images are passed through: the compressed IDAT data
+    is used as it is. Images with an alpha channel are decoded, and the
+    colour channels and the alpha channel are compressed separately; the
+    alpha channel is left out if the image is opaque.
+
+    Returns a PNGImage, or None if the image has to be left to reportlab:
+    palette images, 16-bit images and interlaced images without alpha.
+    """
+    with open(filename, 'rb') as fp:
+        try:
+            mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            return None
+        try:
+            chunks = _parse_png(mm, filename)
+            if chunks is None:
+                return None
+            header, transparent, idat = chunks
+            if _can_pass_through(header):
+                return PNGImage(
+                    width=header.width, height=header.height,
+                    bit_depth=header.bit_depth,
+                    colors=PASSTHROUGH_FORMATS[header.color_type][0],
+                    transparent=transparent, predictor=True,
+                    data=b''.join(mm[start:end] for start, end in idat),
+                    alpha=None)
+        finally:
+            mm.close()
+
+    if header.color_type in ALPHA_FORMATS and header.bit_depth == 8:
+        return _split_alpha(filename, header)
+
+    _log.debug('{}: PNG format not supported'.format(filename))
+    return None
+
+
+def _can_pass_through(header):
+    return (header.color_type in PASSTHROUGH_FORMATS
+            and header.bit_depth in PASSTHROUGH_FORMATS[header.color_type][1]
+            and header.interlace == 0)
+
+
+def _parse_png(mm, filename):
+    """
+    Return (header, transparent, idat), where transparent is the colour key
+    from a tRNS chunk (or None) and idat is a list of (start, end) offsets
+    of the IDAT chunk data, or None if the file is not a usable PNG file.
+    """
+    if mm[:8] != PNG_SIGNATURE:
+        _log.debug('{}: not a PNG file'.format(filename))
+        return None
+
+    header = None
+    transparent = None
+    idat = []
+
+    pos = 8
+    while pos + 8 <= len(mm):
+        length, chunk_type = struct.unpack('>I4s', mm[pos:pos+8])
+        start = pos + 8
+        end = start + length
+        if end + 4 > len(mm):
+            _log.debug('{}: truncated PNG file'.format(filename))
+            return None
+        # skip the CRC
+        pos = end + 4
+
+        if chunk_type == b'IHDR':
+            if length != 13:
+                return None
+            header = PNGHeader(*struct.unpack('>IIBBBBB', mm[start:end]))
+            if header.compression != 0 or header.filter_method != 0:
+                return None
+        elif header is None:
+            # IHDR must come first
+            return None
+        elif chunk_type == b'tRNS':
+            if header.color_type not in PASSTHROUGH_FORMATS:
+                # palette alpha: left to reportlab
+                continue
+            channels = PASSTHROUGH_FORMATS[header.color_type][0]
+            if length != 2 * channels:
+                _log.debug('{}: bad tRNS chunk'.format(filename))
+                return None
+            transparent = struct.unpack('>{}H'.format(channels),
+                                        mm[start:end])
+        elif chunk_type == b'IDAT':
+            idat.append((start, end))
+        elif chunk_type == b'IEND':
+            break
+
+    if header is None or not idat:
+        return None
+
+    return header, transparent, idat
+
+
+def _split_alpha(filename, header):
+    # Undoing the PNG filters in Python would be far slower than letting
+    # PIL (which reportlab needs for PNG files anyway) decode the image.
+    from PIL import Image
+
+    colors, mode = ALPHA_FORMATS[header.color_type]
+    im = Image.open(filename)
+    im.load()
+    alpha = im.split()[-1]
+    min_alpha, max_alpha = alpha.getextrema()
+
+    if max_alpha == 0:
+        # Nothing to draw: LectureNotes stores empty layers like this
+        data = None
+        alpha_data = None
+    else:
+        data = zlib.compress(im.convert(mode).tobytes())
+        if min_alpha == 255:
+            alpha_data = None
+        else:
+            alpha_data = zlib.compress(alpha.tobytes())
+
+    return PNGImage(width=header.width, height=header.height, bit_depth=8,
+                    colors=colors, transparent=None, predictor=False,
+                    data=data, alpha=alpha_data)
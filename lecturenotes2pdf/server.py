@@ -0,0 +1,71 @@
+"""
+lecturenotes2pdf.server
+
+Long-running conversion worker speaking a simple stdin/stdout protocol.
+
+Each request is one line on stdin containing the location of a notebook.
+For each request, the worker writes either
+
+    OK <length>\\n<length bytes of PDF data>
+
+or
+
+    ERROR <message>\\n
+
+to stdout. The worker exits at end of input.
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+import sys
+
+from reportlab.pdfbase import pdfmetrics
+
+from .notebook import Notebook
+from .pdf import notebook2pdf_bytes
+
+_log = logging.getLogger(__name__)
+
+# All fonts PDFTextingMachine may select
+FONTS = ['Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique',
+         'Helvetica-BoldOblique',
+         'Times-Roman', 'Times-Bold', 'Times-Italic', 'Times-BoldItalic',
+         'Courier', 'Courier-Bold', 'Courier-Oblique', 'Courier-BoldOblique']
+
+
+def warm_up():
+    """
+    Load font metrics in advance so the first request isn't slower
+    """
+    for font in FONTS:
+        pdfmetrics.getFont(font)
+
+
+def _binary_stream(stream):
+    return getattr(stream, 'buffer', stream)
+
+
+def serve(instream=None, outstream=None):
+    if instream is None:
+        instream = sys.stdin
+    if outstream is None:
+        outstream = _binary_stream(sys.stdout)
+
+    warm_up()
+
+    for line in iter(instream.readline, ''):
+        location = line.strip()
+        if not location:
+            continue
+        _log.info('converting {}'.format(location))
+        try:
+            data = notebook2pdf_bytes(Notebook(location))
+        except Exception as e:
+            _log.exception('error converting {}'.format(location))
+            message = ' '.join(str(e).split()) or type(e).__name__
+            outstream.write('ERROR {}\n'.format(message).encode('utf-8'))
+        else:
+            outstream.write('OK {}\n'.format(len(data)).encode('ascii'))
+            outstream.write(data)
+        outstream.flush()
@@ -0,0 +1,281 @@
+"""
+lecturenotes2pdf.workqueue
+
+Conversion job queue in an SQLite database on shared storage.
+
+A coordinator adds one job per notebook; any number of workers, on any
+number of hosts that can see the database, the notebooks and the output
+directory under the same paths, take jobs out and convert them. A job is
+leased to one worker at a time, and the worker keeps renewing the lease
+while it converts the notebook. If the lease expires because the worker
+died, the job is handed out again, up to max_attempts times.
+"""
+
+from __future__ import absolute_import
+
+import logging
+import os
+import os.path
+import re
+import socket
+import sqlite3
+import threading
+import time
+
+from .notebook import Notebook
+
+_log = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    location TEXT NOT NULL UNIQUE,
+    output TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    error TEXT
+)
+'''
+
+
+def default_worker_name():
+    return '{}:{}'.format(socket.gethostname(), os.getpid())
+
+
+class WorkQueue(object):
+    def __init__(self, path, lease_time=1800, max_attempts=3):
+        if lease_time <= 0:
+            raise ValueError('lease time must be positive')
+        self.path = path
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+
+        # Autocommit mode: transactions are started explicitly, so that
+        # claiming a job can take the write lock before looking for one.
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._db.execute(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def add(self, location, output):
+        """
+        Add a job for location, or put the existing one back in the queue.
+
+        A job that is currently leased to a worker is left alone, unless
+        the lease has expired.
+        """
+        cursor = self._db.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute(
+                'UPDATE jobs SET output = ?, state = ?, attempts = 0, '
+                'worker = NULL, lease_expires = NULL, error = NULL '
+                'WHERE location = ? AND (state != ? OR lease_expires < ?)',
+                (output, PENDING, location, RUNNING, time.time()))
+            cursor.execute(
+                'INSERT OR IGNORE INTO jobs (location, output, state) '
+                'VALUES (?, ?, ?)', (location, output, PENDING))
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+        cursor.execute('COMMIT')
+
+    def claim(self, worker):
+        """
+        Lease the next available job to worker.
+
+        Returns a (job_id, location, output) tuple, or None if no job is
+        available.
+        """
+        cursor = self._db.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            # Jobs whose last lease ran out on the final attempt have failed
+            cursor.execute(
+                'UPDATE jobs SET state = ?, error = ? '
+                'WHERE state = ? AND lease_expires < ? AND attempts >= ?',
+                (FAILED, 'lease expired', RUNNING, now, self.max_attempts))
+            cursor.execute(
+                'SELECT id, location, output FROM jobs '
+                'WHERE state = ? OR (state = ? AND lease_expires < ?) '
+                'ORDER BY attempts, id LIMIT 1',
+                (PENDING, RUNNING, now))
+            job = cursor.fetchone()
+            if job is not None:
+                cursor.execute(
+                    'UPDATE jobs SET state = ?, worker = ?, '
+                    'lease_expires = ?, attempts = attempts + 1 '
+                    'WHERE id = ?',
+                    (RUNNING, worker, now + self.lease_time, job[0]))
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+        cursor.execute('COMMIT')
+        return job
+
+    def renew(self, job_id, worker):
+        """
+        Extend worker's lease on a job.
+
+        Returns False if the job is no longer leased to worker.
+        """
+        cursor = self._db.execute(
+            'UPDATE jobs SET lease_expires = ? '
+            'WHERE id = ? AND worker = ? AND state = ?',
+            (time.time() + self.lease_time, job_id, worker, RUNNING))
+        return cursor.rowcount > 0
+
+    def complete(self, job_id, worker):
+        """
+        Mark a job as done.
+
+        This is accepted even if the lease has since passed to another
+        worker: the output has been written either way.
+        """
+        self._db.execute(
+            'UPDATE jobs SET state = ?, worker = ?, error = NULL '
+            'WHERE id = ?', (DONE, worker, job_id))
+
+    def fail(self, job_id, worker, error):
+        """
+        Record a failed attempt; the job is retried if it has attempts left
+        """
+        self._db.execute(
+            'UPDATE jobs SET state = CASE WHEN attempts >= ? '
+            'THEN ? ELSE ? END, error = ? '
+            'WHERE id = ? AND worker = ?',
+            (self.max_attempts, FAILED, PENDING, error, job_id, worker))
+
+    def next_lease_expiry(self):
+        """
+        Return the time at which the first lease on a running job expires,
+        or None if no jobs are running
+        """
+        return self._db.execute(
+            'SELECT MIN(lease_expires) FROM jobs WHERE state = ?',
+            (RUNNING,)).fetchone()[0]
+
+    def counts(self):
+        """
+        Return a dict mapping job states to the number of jobs in that state
+        """
+        return dict(self._db.execute(
+            'SELECT state, COUNT(*) FROM jobs GROUP BY state'))
+
+    def jobs(self, state=None):
+        """
+        List (location, output, state, attempts, error) for all jobs
+        """
+        sql = 'SELECT location, output, state, attempts, error FROM jobs'
+        if state is None:
+            return self._db.execute(sql + ' ORDER BY id').fetchall()
+        else:
+            return self._db.execute(sql + ' WHERE state = ? ORDER BY id',
+                                    (state,)).fetchall()
+
+
+def _replace_file(src, dst):
+    try:
+        os.rename(src, dst)
+    except OSError:
+        # On Windows, rename fails if dst exists
+        if not os.path.exists(dst):
+            raise
+        os.remove(dst)
+        os.rename(src, dst)
+
+
+class _LeaseKeeper(threading.Thread):
+    """
+    Renews the lease on a job at regular intervals until stopped
+    """
+    def __init__(self, queue, job_id, worker):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.queue_path = queue.path
+        self.lease_time = queue.lease_time
+        self.job_id = job_id
+        self.worker = worker
+        self._stopped = threading.Event()
+
+    def run(self):
+        # SQLite connections can't be shared between threads
+        queue = WorkQueue(self.queue_path, lease_time=self.lease_time)
+        try:
+            while not self._stopped.wait(self.lease_time / 3.0):
+                try:
+                    if not queue.renew(self.job_id, self.worker):
+                        _log.warning('{}: lost lease on job {}'.format(
+                            self.worker, self.job_id))
+                        break
+                except sqlite3.Error as e:
+                    _log.warning('{}: could not renew lease on job {}: {}'
+                                 .format(self.worker, self.job_id, e))
+        finally:
+            queue.close()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def work(queue, worker=None, poll_interval=60):
+    """
+    Convert jobs from queue until no jobs are pending or running.
+
+    While other workers hold the only remaining jobs, wait (checking the
+    queue at least every poll_interval seconds), so that the jobs of workers
+    that die are picked up when their leases expire.
+
+    Returns the number of jobs that were converted successfully.
+    """
+    # reportlab is only needed by workers
+    from .pdf import notebook2pdf
+
+    if worker is None:
+        worker = default_worker_name()
+
+    done = 0
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            expires = queue.next_lease_expiry()
+            if expires is None:
+                return done
+            _log.info('{}: waiting for jobs held by other workers'
+                      .format(worker))
+            time.sleep(min(max(expires - time.time(), 0) + 1, poll_interval))
+            continue
+        job_id, location, output = job
+        _log.info('{}: converting {} to {}'.format(worker, location, output))
+
+        # Write to a private file first, so that a worker whose lease has
+        # run out can't leave a half-written PDF behind.
+        # (The worker name may contain ':', which SMB shares don't allow.)
+        tmp_output = '{}.{}.part'.format(
+            output, re.sub(r'[^A-Za-z0-9_.-]', '_', worker))
+        lease_keeper = _LeaseKeeper(queue, job_id, worker)
+        lease_keeper.start()
+        try:
+            notebook2pdf(Notebook(location), tmp_output)
+            _replace_file(tmp_output, output)
+        except Exception as e:
+            _log.exception('{}: error converting {}'.format(worker, location))
+            if os.path.exists(tmp_output):
+                os.remove(tmp_output)
+            queue.fail(job_id, worker,
+                       ' '.join(str(e).split()) or type(e).__name__)
+        else:
+            queue.complete(job_id, worker)
+            done += 1
+        finally:
+            lease_keeper.stop()
@@ -0,0 +1,63 @@
+import struct
+import zlib
+
+import pytest
+
+NOTEBOOK_XML = '''<?xml version="1.0" encoding="utf-8"?>
+<notebook>
+<paperwidth>40</paperwidth>
+<paperheight>60</paperheight>
+<papercolor>-1</papercolor>
+<textlayerfontfamily>0</textlayerfontfamily>
+<textlayerfontstyle>0</textlayerfontstyle>
+<textlayerfontsize>40</textlayerfontsize>
+<textlayerfontcolor>-16777216</textlayerfontcolor>
+<textlayerleftmargin>0.1</textlayerleftmargin>
+<textlayertopmargin>0.1</textlayertopmargin>
+<textlayerrightmargin>0.1</textlayerrightmargin>
+<textlayerbottommargin>0.1</textlayerbottommargin>
+<layers>2</layers>
+<displayedlayers>2</displayedlayers>
+<textlayer>2</textlayer>
+<displaytextlayer>1</displaytextlayer>
+</notebook>
+'''
+
+
+def png_chunk(chunk_type, data):
+    crc = zlib.crc32(chunk_type + data) & 0xffffffff
+    return (struct.pack('>I', len(data)) + chunk_type + data
+            + struct.pack('>I', crc))
+
+
+def rgb_png(width, height, rgb):
+    row = b'\x00' + bytes(bytearray(rgb)) * width
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR', ihdr)
+            + png_chunk(b'IDAT', zlib.compress(row * height))
+            + png_chunk(b'IEND', b''))
+
+
+@pytest.fixture
+def notebook_dir(tmp_path):
+    """
+    A notebook with two pages, each with one image layer and text
+    """
+    root = tmp_path / 'notes'
+    root.mkdir()
+    (root / 'notebook.xml').write_text(NOTEBOOK_XML)
+    for number, rgb in [(1, (255, 0, 0)), (2, (0, 0, 255))]:
+        (root / 'page{}.png'.format(number)).write_bytes(
+            rgb_png(40, 60, rgb))
+        (root / 'text{}.txt'.format(number)).write_text(
+            u'page {}\nsecond line'.format(number))
+    return str(root)
+
+
+@pytest.fixture
+def invariant_pdf(monkeypatch):
+    """
+    Make reportlab output the same PDF every time (no dates or random IDs)
+    """
+    rl_config = pytest.importorskip('reportlab.rl_config')
+    monkeypatch.setattr(rl_config, 'invariant', 1)
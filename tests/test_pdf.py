@@ -0,0 +1,40 @@
+import io
+
+import pytest
+
+pytest.importorskip('reportlab')
+
+from lecturenotes2pdf.notebook import Notebook
+from lecturenotes2pdf.pdf import (notebook2pdf, notebook2pdf_bytes,
+                                  iter_notebook2pdf)
+
+
+@pytest.fixture
+def notebook(notebook_dir, invariant_pdf):
+    return Notebook(notebook_dir)
+
+
+def test_bytes(notebook):
+    data = notebook2pdf_bytes(notebook)
+    assert data.startswith(b'%PDF-')
+    assert data.rstrip().endswith(b'%%EOF')
+
+
+def test_stream(notebook):
+    stream = io.BytesIO()
+    notebook2pdf(notebook, stream)
+    assert stream.getvalue() == notebook2pdf_bytes(notebook)
+
+
+def test_file(notebook, tmp_path):
+    filename = str(tmp_path / 'out.pdf')
+    notebook2pdf(notebook, filename)
+    with open(filename, 'rb') as fp:
+        assert fp.read() == notebook2pdf_bytes(notebook)
+
+
+def test_chunks(notebook):
+    chunks = list(iter_notebook2pdf(notebook, chunk_size=100))
+    assert all(len(chunk) == 100 for chunk in chunks[:-1])
+    assert 0 < len(chunks[-1]) <= 100
+    assert b''.join(chunks) == notebook2pdf_bytes(notebook)
@@ -0,0 +1,120 @@
+import struct
+import zlib
+
+import pytest
+
+from lecturenotes2pdf.png import read_png
+
+
+def chunk(chunk_type, data):
+    crc = zlib.crc32(chunk_type + data) & 0xffffffff
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', crc)
+
+
+def make_png(width=2, height=2, bit_depth=8, color_type=2, interlace=0,
+             extra_chunks=(), rows=None, idat_parts=1):
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[color_type]
+    if rows is None:
+        row_bytes = (width * channels * bit_depth + 7) // 8
+        rows = [b'\x00' + b'\x7f' * row_bytes for _ in range(height)]
+    compressed = zlib.compress(b''.join(rows))
+    step = len(compressed) // idat_parts + 1
+    idat = b''.join(chunk(b'IDAT', compressed[i:i+step])
+                    for i in range(0, len(compressed), step))
+    ihdr = struct.pack('>IIBBBBB', width, height, bit_depth, color_type,
+                       0, 0, interlace)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr)
+            + b''.join(extra_chunks) + idat + chunk(b'IEND', b''))
+
+
+@pytest.fixture
+def png_file(tmp_path):
+    def write(data):
+        path = tmp_path / 'page1.png'
+        path.write_bytes(data)
+        return str(path)
+    return write
+
+
+def test_rgb_passthrough(png_file):
+    data = make_png(idat_parts=3)
+    png = read_png(png_file(data))
+    assert (png.width, png.height, png.bit_depth, png.colors) == (2, 2, 8, 3)
+    assert png.predictor
+    assert png.transparent is None
+    assert png.alpha is None
+    assert zlib.decompress(png.data) == (b'\x00' + b'\x7f' * 6) * 2
+
+
+@pytest.mark.parametrize('bit_depth', [1, 2, 4, 8])
+def test_gray_passthrough(png_file, bit_depth):
+    png = read_png(png_file(make_png(bit_depth=bit_depth, color_type=0)))
+    assert (png.bit_depth, png.colors) == (bit_depth, 1)
+
+
+def test_transparent_color(png_file):
+    trns = chunk(b'tRNS', struct.pack('>3H', 255, 255, 255))
+    png = read_png(png_file(make_png(extra_chunks=[trns])))
+    assert png.transparent == (255, 255, 255)
+
+
+@pytest.mark.parametrize('kwargs', [
+    dict(color_type=3),
+    # palette with alpha for 3 of its entries
+    dict(color_type=3,
+         extra_chunks=[chunk(b'PLTE', b'\0' * 9),
+                       chunk(b'tRNS', b'\0\x80\xff')]),
+    # colour key of the wrong size
+    dict(extra_chunks=[chunk(b'tRNS', b'\0\0')]),
+    dict(bit_depth=16),
+    dict(interlace=1),
+])
+def test_unsupported_formats(png_file, kwargs):
+    assert read_png(png_file(make_png(**kwargs))) is None
+
+
+def test_not_a_png(png_file):
+    assert read_png(png_file(b'GIF89a' + b'\0' * 20)) is None
+
+
+def test_empty_file(png_file):
+    assert read_png(png_file(b'')) is None
+
+
+def test_truncated(png_file):
+    data = make_png()
+    assert read_png(png_file(data[:-20])) is None
+
+
+def test_no_idat(png_file):
+    ihdr = struct.pack('>IIBBBBB', 2, 2, 8, 2, 0, 0, 0)
+    data = (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr)
+            + chunk(b'IEND', b''))
+    assert read_png(png_file(data)) is None
+
+
+def rgba_png(alphas):
+    row = b'\x00' + b''.join(b'\x10\x20\x30' + struct.pack('B', a)
+                             for a in alphas)
+    return make_png(width=len(alphas), height=1, color_type=6, rows=[row])
+
+
+def test_alpha_split(png_file):
+    pytest.importorskip('PIL')
+    png = read_png(png_file(rgba_png([0, 128, 255])))
+    assert not png.predictor
+    assert zlib.decompress(png.data) == b'\x10\x20\x30' * 3
+    assert zlib.decompress(png.alpha) == b'\x00\x80\xff'
+
+
+def test_alpha_opaque(png_file):
+    pytest.importorskip('PIL')
+    png = read_png(png_file(rgba_png([255, 255])))
+    assert zlib.decompress(png.data) == b'\x10\x20\x30' * 2
+    assert png.alpha is None
+
+
+def test_alpha_transparent(png_file):
+    pytest.importorskip('PIL')
+    png = read_png(png_file(rgba_png([0, 0])))
+    assert png.data is None
@@ -0,0 +1,37 @@
+import io
+
+import pytest
+
+pytest.importorskip('reportlab')
+
+from lecturenotes2pdf.notebook import Notebook
+from lecturenotes2pdf.pdf import notebook2pdf_bytes
+from lecturenotes2pdf.server import serve
+
+
+def read_response(stream):
+    status, _, rest = stream.readline().rstrip(b'\n').partition(b' ')
+    if status == b'OK':
+        data = stream.read(int(rest))
+        assert len(data) == int(rest)
+        return status, data
+    else:
+        return status, rest
+
+
+def test_serve(notebook_dir, invariant_pdf, tmp_path):
+    bad_location = str(tmp_path / 'nonexistent')
+    instream = io.StringIO(u'{0}\n\n{1}\n{0}\n'.format(notebook_dir,
+                                                       bad_location))
+    outstream = io.BytesIO()
+
+    serve(instream, outstream)
+
+    expected = notebook2pdf_bytes(Notebook(notebook_dir))
+    outstream.seek(0)
+    assert read_response(outstream) == (b'OK', expected)
+    status, message = read_response(outstream)
+    assert status == b'ERROR'
+    assert message
+    assert read_response(outstream) == (b'OK', expected)
+    assert outstream.read() == b''
@@ -0,0 +1,129 @@
+import time
+
+import pytest
+
+from lecturenotes2pdf.workqueue import (WorkQueue, PENDING, RUNNING, DONE,
+                                        FAILED)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = WorkQueue(str(tmp_path / 'queue.db'), lease_time=60, max_attempts=2)
+    yield q
+    q.close()
+
+
+def states(queue):
+    return [(location, state, attempts)
+            for location, output, state, attempts, error in queue.jobs()]
+
+
+def test_claim_in_order(queue):
+    queue.add('/a', '/a.pdf')
+    queue.add('/b', '/b.pdf')
+    assert queue.claim('w1')[1:] == ('/a', '/a.pdf')
+    assert queue.claim('w2')[1:] == ('/b', '/b.pdf')
+    assert queue.claim('w3') is None
+    assert queue.counts() == {RUNNING: 2}
+
+
+def test_complete(queue):
+    queue.add('/a', '/a.pdf')
+    job_id = queue.claim('w1')[0]
+    queue.complete(job_id, 'w1')
+    assert states(queue) == [('/a', DONE, 1)]
+    assert queue.claim('w1') is None
+
+
+def test_fail_and_retry(queue):
+    queue.add('/a', '/a.pdf')
+    job_id = queue.claim('w1')[0]
+    queue.fail(job_id, 'w1', 'boom')
+    assert states(queue) == [('/a', PENDING, 1)]
+    job_id = queue.claim('w2')[0]
+    queue.fail(job_id, 'w2', 'boom')
+    assert queue.jobs() == [('/a', '/a.pdf', FAILED, 2, 'boom')]
+    assert queue.claim('w3') is None
+
+
+def test_fail_from_old_lease_holder_ignored(queue):
+    queue.add('/a', '/a.pdf')
+    job_id = queue.claim('w1')[0]
+    queue.fail(job_id, 'w2', 'not mine')
+    assert states(queue) == [('/a', RUNNING, 1)]
+
+
+def test_expired_lease(queue):
+    queue.lease_time = 0
+    queue.add('/a', '/a.pdf')
+    job_id = queue.claim('w1')[0]
+    time.sleep(0.01)
+    assert queue.claim('w2')[0] == job_id
+    time.sleep(0.01)
+    # out of attempts
+    assert queue.claim('w3') is None
+    assert queue.jobs() == [('/a', '/a.pdf', FAILED, 2, 'lease expired')]
+
+
+def test_renew(queue):
+    queue.lease_time = 0
+    queue.add('/a', '/a.pdf')
+    job_id = queue.claim('w1')[0]
+    queue.lease_time = 60
+    assert queue.renew(job_id, 'w1')
+    assert not queue.renew(job_id, 'w2')
+    assert queue.claim('w2') is None
+
+
+def test_complete_after_lease_moved(queue):
+    queue.lease_time = 0
+    queue.add('/a', '/a.pdf')
+    job_id = queue.claim('w1')[0]
+    time.sleep(0.01)
+    queue.claim('w2')
+    assert not queue.renew(job_id, 'w1')
+    queue.complete(job_id, 'w1')
+    assert states(queue) == [('/a', DONE, 2)]
+
+
+def test_add_requeues(queue):
+    for location in ['/a', '/b', '/c']:
+        queue.add(location, location + '.pdf')
+    job_id = queue.claim('w1')[0]
+    queue.complete(job_id, 'w1')
+    job_id = queue.claim('w1')[0]
+    queue.fail(job_id, 'w1', 'boom')
+    queue.claim('w1')
+
+    for location in ['/a', '/b', '/c']:
+        queue.add(location, '/new' + location + '.pdf')
+    assert queue.jobs() == [
+        ('/a', '/new/a.pdf', PENDING, 0, None),
+        ('/b', '/new/b.pdf', PENDING, 0, None),
+        ('/c', '/c.pdf', RUNNING, 1, None),
+    ]
+
+
+def test_next_lease_expiry(queue):
+    assert queue.next_lease_expiry() is None
+    queue.add('/a', '/a.pdf')
+    assert queue.next_lease_expiry() is None
+    before = time.time()
+    job_id = queue.claim('w1')[0]
+    assert before + 60 <= queue.next_lease_expiry() <= time.time() + 60
+    queue.complete(job_id, 'w1')
+    assert queue.next_lease_expiry() is None
+
+
+def test_lease_time_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        WorkQueue(str(tmp_path / 'queue.db'), lease_time=0)
+
+
+def test_add_requeues_expired(queue):
+    queue.lease_time = 0
+    queue.add('/a', '/a.pdf')
+    queue.claim('w1')
+    time.sleep(0.01)
+    queue.add('/a', '/new/a.pdf')
+    assert queue.jobs() == [('/a', '/new/a.pdf', PENDING, 0, None)]